@@ -0,0 +1,310 @@
+# -----------------------------------------------------------------------------
+# Predbat Home Battery System
+# Copyright Trefor Southwell 2026 - All Rights Reserved
+# This application maybe used for personal use only and not for commercial use
+# -----------------------------------------------------------------------------
+# fmt off
+# pylint: disable=consider-using-f-string
+# pylint: disable=line-too-long
+# pylint: disable=attribute-defined-outside-init
+
+import atexit
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard as zstd
+
+    ZSTD_ERRORS = (zstd.ZstdError,)
+except ImportError:
+    zstd = None
+    ZSTD_ERRORS = ()
+
+LOAD_ERRORS = (OSError, ValueError) + ZSTD_ERRORS
+
+# _write_file outcomes: failures are falsy so results convert to success booleans
+WRITE_FAILED = 0
+WRITE_DONE = 1
+WRITE_SKIPPED = 2
+
+
+class PersistentStore:
+    """
+    Base class for components that persist JSON data to per-file stores on disk.
+
+    Provides atomic save (write to a temporary file then rename into place),
+    optional backup copies, tolerant load and age-based cleanup of old files.
+    Serialization uses orjson when available (writes bytes directly, much faster
+    on large dict payloads) and falls back to stdlib json otherwise.
+    """
+
+    def __init__(self, base, save_dir):
+        """
+        Initialize the store and create the save directory if required.
+
+        Args:
+            base: The main Predbat base object providing system-wide services
+            save_dir: Directory in which this store keeps its files
+        """
+        self.base = base
+        self.log = base.log
+        self.save_dir = save_dir
+        self._last_hash = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="PersistentStoreBackup")
+        atexit.register(self._writer.shutdown, wait=True)
+        os.makedirs(self.save_dir, exist_ok=True)
+
+    def save(self, filepath, data, backup=True):
+        """
+        Serialize data as JSON and atomically write it to filepath.
+
+        The write (and backup refresh) is skipped entirely when the serialized
+        payload is identical to what this store last wrote to the file.
+
+        Args:
+            filepath: Full path of the file to write
+            data: JSON-serializable data to store
+            backup: When True also refresh a .bak copy alongside the file
+
+        Returns:
+            True on success, False if the write failed
+        """
+        try:
+            digest, chunks = self._serialize(data)
+        except (TypeError, ValueError) as e:
+            self.log("Warn: Failed to serialize {}: {}".format(filepath, e))
+            return False
+        result = self._write_file(filepath, chunks, digest, backup)
+        if result == WRITE_DONE:
+            self._sync_save_dir()
+        return result != WRITE_FAILED
+
+    def save_batch(self, items):
+        """
+        Save several files, serializing every payload before the first write.
+
+        Grouping the writes keeps the serialization work off the I/O phase and
+        gives a single place to batch the underlying file operations.
+
+        Args:
+            items: List of (filepath, data, backup) tuples as accepted by save
+
+        Returns:
+            List of per-file success booleans in the same order as items
+        """
+        payloads = []
+        for filepath, data, backup in items:
+            try:
+                digest, chunks = self._serialize(data)
+                payloads.append((filepath, chunks, digest, backup))
+            except (TypeError, ValueError) as e:
+                self.log("Warn: Failed to serialize {}: {}".format(filepath, e))
+                payloads.append((filepath, None, None, backup))
+        results = [self._write_file(filepath, chunks, digest, backup) if chunks is not None else WRITE_FAILED for filepath, chunks, digest, backup in payloads]
+        if WRITE_DONE in results:
+            self._sync_save_dir()
+        return [result != WRITE_FAILED for result in results]
+
+    def _serialize(self, data):
+        """
+        Serialize data to JSON with sorted keys.
+
+        With orjson the payload is one bytes buffer. On the stdlib fallback the
+        content digest is computed over a streaming iterencode pass and the
+        returned chunks re-encode lazily, so the full payload is never
+        materialized in memory at once.
+
+        Args:
+            data: JSON-serializable data to store
+
+        Returns:
+            Tuple of (digest, chunks) where digest is the payload content hash
+            and chunks is an iterable of bytes to write
+        """
+        if orjson:
+            buf = orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+            return hashlib.blake2b(buf, digest_size=8).digest(), (buf,)
+        encoder = json.JSONEncoder(sort_keys=True)
+        hasher = hashlib.blake2b(digest_size=8)
+        for chunk in encoder.iterencode(data):
+            hasher.update(chunk.encode("utf-8"))
+        return hasher.digest(), (chunk.encode("utf-8") for chunk in encoder.iterencode(data))
+
+    def _write_file(self, filepath, chunks, digest, backup):
+        """
+        Atomically write a serialized payload to disk unless it is unchanged.
+
+        Args:
+            filepath: Full path of the file to write
+            chunks: Iterable of serialized payload byte chunks
+            digest: Content hash of the payload, used to skip no-op rewrites
+            backup: When True also refresh a .bak copy alongside the file
+
+        Returns:
+            WRITE_DONE when the file was written, WRITE_SKIPPED when the
+            payload was unchanged, WRITE_FAILED on error
+        """
+        try:
+            target = filepath + ".zst" if zstd else filepath
+            if self._last_hash.get(filepath) == digest and os.path.exists(target):
+                return WRITE_SKIPPED
+            tmp_filepath = target + ".tmp"
+            with open(tmp_filepath, "wb") as han:
+                if zstd:
+                    with zstd.ZstdCompressor(level=1).stream_writer(han, closefd=False) as compressor:
+                        for chunk in chunks:
+                            compressor.write(chunk)
+                else:
+                    han.writelines(chunks)
+                han.flush()
+                if hasattr(os, "fdatasync"):
+                    os.fdatasync(han.fileno())
+                else:
+                    os.fsync(han.fileno())
+            os.replace(tmp_filepath, target)
+            if zstd:
+                if os.path.exists(filepath):
+                    os.unlink(filepath)
+            elif os.path.exists(filepath + ".zst"):
+                # A leftover compressed variant from a run where zstandard was
+                # installed would otherwise shadow this newer plain file on load
+                os.unlink(filepath + ".zst")
+            if backup:
+                self._writer.submit(self._copy_backup, target)
+            self._last_hash[filepath] = digest
+            return WRITE_DONE
+        except OSError as e:
+            self.log("Warn: Failed to save {}: {}".format(filepath, e))
+            self._last_hash.pop(filepath, None)
+            return WRITE_FAILED
+
+    def _sync_save_dir(self):
+        """
+        Flush the save directory entry so completed renames survive a crash.
+
+        Called once per save or batch rather than per file. A no-op on
+        platforms where directories cannot be opened for fsync.
+        """
+        try:
+            dir_fd = os.open(self.save_dir, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+    def _copy_backup(self, filepath):
+        """
+        Refresh the .bak copy of a file, runs on the background writer thread.
+
+        Args:
+            filepath: Full path of the file to back up
+        """
+        try:
+            shutil.copyfile(filepath, filepath + ".bak")
+        except OSError as e:
+            self.log("Warn: Failed to backup {}: {}".format(filepath, e))
+
+    def load(self, filepath):
+        """
+        Load and parse a JSON file previously written by save.
+
+        Args:
+            filepath: Full path of the file to read
+
+        Returns:
+            The parsed data, or None if the file is missing or unreadable
+        """
+        zst_filepath = filepath + ".zst"
+        compressed = os.path.exists(zst_filepath)
+        if not compressed and not os.path.exists(filepath):
+            return None
+        try:
+            if compressed:
+                if not zstd:
+                    self.log("Warn: {} is compressed but zstandard is not installed".format(zst_filepath))
+                    return None
+                with open(zst_filepath, "rb") as han:
+                    with zstd.ZstdDecompressor().stream_reader(han) as reader:
+                        buf = reader.read()
+            else:
+                with open(filepath, "rb") as han:
+                    buf = han.read()
+            if orjson:
+                data = orjson.loads(buf)
+            else:
+                data = json.loads(buf)
+        except LOAD_ERRORS as e:
+            self.log("Warn: Failed to load {}: {}".format(zst_filepath if compressed else filepath, e))
+            return None
+        if not compressed and zstd:
+            self._migrate_compressed(filepath, buf)
+        return data
+
+    def _migrate_compressed(self, filepath, buf):
+        """
+        Rewrite an uncompressed store file as its compressed variant.
+
+        Called when a plain file is read while compression is available so old
+        files converge to the compressed format without a separate migration.
+
+        Args:
+            filepath: Full path of the uncompressed file
+            buf: The file's contents as read from disk
+        """
+        try:
+            zst_filepath = filepath + ".zst"
+            tmp_filepath = zst_filepath + ".tmp"
+            with open(tmp_filepath, "wb") as han:
+                han.write(zstd.ZstdCompressor(level=1).compress(buf))
+            os.replace(tmp_filepath, zst_filepath)
+            os.unlink(filepath)
+        except OSError as e:
+            self.log("Warn: Failed to compress {}: {}".format(filepath, e))
+
+    def actual_path(self, filepath):
+        """
+        Return the path the data for filepath actually lives at on disk.
+
+        Args:
+            filepath: Logical (uncompressed) path of the file
+
+        Returns:
+            The compressed variant when present, otherwise filepath itself
+        """
+        zst_filepath = filepath + ".zst"
+        if os.path.exists(zst_filepath):
+            return zst_filepath
+        return filepath
+
+    def cleanup(self, pattern, keep_days):
+        """
+        Remove files in the save directory older than the retention period.
+
+        Args:
+            pattern: Glob pattern of filenames to consider (relative to save_dir)
+            keep_days: Files with a modification time older than this many days are removed
+        """
+        cutoff = time.time() - keep_days * 24 * 60 * 60
+        try:
+            with os.scandir(self.save_dir) as entries:
+                for entry in entries:
+                    try:
+                        if fnmatch.fnmatch(entry.name, pattern) and entry.is_file() and entry.stat().st_mtime < cutoff:
+                            os.unlink(entry.path)
+                            self.log("Removed old file {}".format(entry.path))
+                    except OSError as e:
+                        self.log("Warn: Failed to remove old file {}: {}".format(entry.path, e))
+        except OSError as e:
+            self.log("Warn: Failed to scan {} for cleanup: {}".format(self.save_dir, e))
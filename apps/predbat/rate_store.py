@@ -0,0 +1,342 @@
+# -----------------------------------------------------------------------------
+# Predbat Home Battery System
+# Copyright Trefor Southwell 2026 - All Rights Reserved
+# This application maybe used for personal use only and not for commercial use
+# -----------------------------------------------------------------------------
+# fmt off
+# pylint: disable=consider-using-f-string
+# pylint: disable=line-too-long
+# pylint: disable=attribute-defined-outside-init
+
+import os
+from datetime import date
+from functools import lru_cache
+
+from persistent_store import PersistentStore
+
+RATE_STORE_KEEP_DAYS = 7
+RATE_STORE_VERSION = 4
+RATE_STORE_SCALE = 100
+SLOT_MINUTES = 30
+N_SLOTS = 24 * 60 // SLOT_MINUTES
+
+
+@lru_cache(maxsize=32)
+def _filepath_for_ordinal(save_dir, ordinal):
+    """
+    Build the rate file path for a date given as an ordinal.
+
+    Cached at module level (keyed on save_dir and ordinal) since the same few
+    dates are resolved on every save and load cycle and strftime plus join is
+    pure overhead to repeat.
+
+    Args:
+        save_dir: Directory holding the rate files
+        ordinal: The date's toordinal() value
+
+    Returns:
+        Full path of the rate file for that date
+    """
+    return os.path.join(save_dir, "rates_{}.json".format(date.fromordinal(ordinal).strftime("%Y-%m-%d")))
+
+
+class RateStore(PersistentStore):
+    """
+    Persistent store for import/export energy rates, one JSON file per date.
+
+    Rates are kept as a dict of minute-of-day -> rate in pence. When saving,
+    rates for minutes before the freeze point are preserved from the existing
+    file so that historical rates are not rewritten by later fetches which only
+    cover the future.
+    """
+
+    def __init__(self, base, save_dir=None, run_cleanup=True):
+        """
+        Initialize the rate store and clean up expired rate files.
+
+        Args:
+            base: The main Predbat base object providing system-wide services
+            save_dir: Directory for rate files, defaults to <config_root>/rate_store
+            run_cleanup: When False skip the retention sweep on startup, used by
+                         tests that create many short-lived stores
+        """
+        if save_dir is None:
+            save_dir = os.path.join(base.config_root, "rate_store")
+        super().__init__(base, save_dir)
+        self._load_cache = {}
+        self._last_saved = {}
+        if run_cleanup:
+            self.cleanup_old_files()
+
+    def _get_filepath(self, rate_date):
+        """
+        Return the full path of the rate file for the given date.
+
+        Args:
+            rate_date: The date the rates apply to
+        """
+        return _filepath_for_ordinal(self.save_dir, rate_date.toordinal())
+
+    def cleanup_old_files(self, keep_days=RATE_STORE_KEEP_DAYS):
+        """
+        Remove rate files (and their backups) older than the retention period.
+
+        Args:
+            keep_days: Retention period in days
+        """
+        self.cleanup("rates_*.json*", keep_days)
+
+    def save_rates(self, rate_date, rate_import, rate_export, freeze_before_minute=0):
+        """
+        Merge the new rates with any existing file for the date and save it.
+
+        Minutes before freeze_before_minute keep the value already on disk when
+        one exists (falling back to the new value for minutes never seen before),
+        minutes at or after it always take the new value.
+
+        Args:
+            rate_date: The date the rates apply to
+            rate_import: Dict of minute-of-day -> import rate
+            rate_export: Dict of minute-of-day -> export rate
+            freeze_before_minute: Minute-of-day below which existing rates are preserved
+
+        Returns:
+            True on success, False if the save failed
+        """
+        filepath, data, merged_import, merged_export = self._prepare_save(rate_date, rate_import, rate_export, freeze_before_minute)
+        return self._record_saved(filepath, self.save(filepath, data, backup=True), merged_import, merged_export)
+
+    def save_rates_batch(self, items):
+        """
+        Merge and save rates for several dates in one batch.
+
+        All payloads are merged and serialized before the first write so the
+        file operations run back to back, amortizing per-save overhead when
+        a fetch updates today, tomorrow and beyond in quick succession.
+
+        Args:
+            items: List of (rate_date, rate_import, rate_export) or
+                   (rate_date, rate_import, rate_export, freeze_before_minute) tuples
+
+        Returns:
+            True when every save succeeded, False if any failed
+        """
+        prepared = [self._prepare_save(*item) for item in items]
+        results = self.save_batch([(filepath, data, True) for filepath, data, _, _ in prepared])
+        recorded = [self._record_saved(filepath, ok, merged_import, merged_export) for (filepath, _, merged_import, merged_export), ok in zip(prepared, results)]
+        return all(recorded)
+
+    def _prepare_save(self, rate_date, rate_import, rate_export, freeze_before_minute=0):
+        """
+        Build the merged payload for a save without touching the target file.
+
+        Args:
+            rate_date: The date the rates apply to
+            rate_import: Dict of minute-of-day -> import rate
+            rate_export: Dict of minute-of-day -> export rate
+            freeze_before_minute: Minute-of-day below which existing rates are preserved
+
+        Returns:
+            Tuple of (filepath, data, merged_import, merged_export)
+        """
+        filepath = self._get_filepath(rate_date)
+        existing_import, existing_export = self._load_existing_arrays(filepath)
+        freeze_slot = max(0, min(N_SLOTS, (freeze_before_minute + SLOT_MINUTES - 1) // SLOT_MINUTES))
+
+        merged_import = self._merge_frozen(existing_import, self._dict_to_array(rate_import), freeze_slot)
+        merged_export = self._merge_frozen(existing_export, self._dict_to_array(rate_export), freeze_slot)
+        data = {
+            "version": RATE_STORE_VERSION,
+            "scale": RATE_STORE_SCALE,
+            "import": [None if rate is None else round(rate * RATE_STORE_SCALE) for rate in merged_import],
+            "export": [None if rate is None else round(rate * RATE_STORE_SCALE) for rate in merged_export],
+        }
+        self._load_cache.pop(filepath, None)
+        return filepath, data, merged_import, merged_export
+
+    def _record_saved(self, filepath, saved, merged_import, merged_export):
+        """
+        Update the save caches after a write attempt.
+
+        Args:
+            filepath: Full path of the rate file
+            saved: Whether the write succeeded
+            merged_import: Import slot array that was written
+            merged_export: Export slot array that was written
+
+        Returns:
+            The saved flag, for convenient chaining
+        """
+        if not saved:
+            self._last_saved.pop(filepath, None)
+            return False
+        try:
+            self._last_saved[filepath] = (os.stat(self.actual_path(filepath), follow_symlinks=False).st_mtime_ns, merged_import, merged_export)
+        except OSError:
+            self._last_saved.pop(filepath, None)
+        return True
+
+    def _load_existing_arrays(self, filepath):
+        """
+        Fetch the slot arrays currently on disk for a rate file.
+
+        Reuses the arrays recorded by the previous save_rates call when the
+        file has not changed since, avoiding the read and reparse on the
+        common save-after-fetch path; otherwise falls back to loading from disk.
+
+        Args:
+            filepath: Full path of the rate file
+
+        Returns:
+            Tuple of (import, export) slot arrays of N_SLOTS values each
+        """
+        last = self._last_saved.get(filepath)
+        if last:
+            try:
+                if os.stat(self.actual_path(filepath), follow_symlinks=False).st_mtime_ns == last[0]:
+                    return last[1], last[2]
+            except OSError:
+                pass
+        entry = self._load_cached(filepath)
+        if entry is None:
+            return [None] * N_SLOTS, [None] * N_SLOTS
+        return entry["import"], entry["export"]
+
+    def _load_cached(self, filepath):
+        """
+        Return the cached slot arrays for a rate file, refreshing on mtime change.
+
+        Args:
+            filepath: Full path of the rate file
+
+        Returns:
+            Cache entry dict with import/export arrays and a lazily-built dict
+            view, or None when the file does not exist
+        """
+        try:
+            mtime_ns = os.stat(self.actual_path(filepath), follow_symlinks=False).st_mtime_ns
+        except OSError:
+            return None
+        entry = self._load_cache.get(filepath)
+        if not entry or entry["mtime_ns"] != mtime_ns:
+            rate_import, rate_export = self._parse_arrays(self.load(filepath))
+            entry = {"mtime_ns": mtime_ns, "import": rate_import, "export": rate_export, "dicts": None}
+            self._load_cache[filepath] = entry
+        return entry
+
+    def _merge_frozen(self, existing, new, freeze_slot):
+        """
+        Merge existing and new slot arrays, preserving existing rates before the freeze slot.
+
+        Args:
+            existing: Slot array already on disk
+            new: Slot array built from the incoming rates
+            freeze_slot: Slots below this keep the existing value when one is present
+
+        Returns:
+            Merged slot array of N_SLOTS values
+        """
+        return [e if e is not None else n for e, n in zip(existing[:freeze_slot], new[:freeze_slot])] + new[freeze_slot:]
+
+    def _dict_to_array(self, rates):
+        """
+        Convert a minute-keyed rate dict into a fixed-length slot array.
+
+        Args:
+            rates: Dict of minute-of-day -> rate, minutes outside the day are ignored
+
+        Returns:
+            List of N_SLOTS rate values, None for slots with no rate
+        """
+        arr = [None] * N_SLOTS
+        for minute, rate in rates.items():
+            if 0 <= minute < 24 * 60:
+                arr[minute // SLOT_MINUTES] = rate
+        return arr
+
+    def _array_to_dict(self, arr):
+        """
+        Convert a fixed-length slot array back into a minute-keyed rate dict.
+
+        Args:
+            arr: List of N_SLOTS rate values, None for slots with no rate
+
+        Returns:
+            Dict of slot-start minute-of-day -> rate for the populated slots
+        """
+        return {slot * SLOT_MINUTES: rate for slot, rate in enumerate(arr) if rate is not None}
+
+    def _parse_arrays(self, data):
+        """
+        Convert loaded file data into fixed-length import/export slot arrays.
+
+        Handles the current scaled fixed-length slot arrays (version 4, integer
+        rates divided by the scale header), their unscaled version 3
+        predecessor, the version 2 struct-of-arrays format (parallel
+        minutes/import/export lists) and the original version 1 format of two
+        dicts keyed by stringified minutes.
+
+        Args:
+            data: Parsed file contents, or None when no file existed
+
+        Returns:
+            Tuple of (import, export) slot arrays of N_SLOTS values each
+        """
+        if not data:
+            return [None] * N_SLOTS, [None] * N_SLOTS
+        version = data.get("version", 1)
+        if version >= 3:
+            imp = data.get("import", [])
+            exp = data.get("export", [])
+            if version >= 4:
+                scale = data.get("scale", RATE_STORE_SCALE)
+                imp = [None if rate is None else rate / scale for rate in imp]
+                exp = [None if rate is None else rate / scale for rate in exp]
+            return (imp + [None] * (N_SLOTS - len(imp)))[:N_SLOTS], (exp + [None] * (N_SLOTS - len(exp)))[:N_SLOTS]
+        if "minutes" in data:
+            minutes = data["minutes"]
+            rate_import = {minute: rate for minute, rate in zip(minutes, data.get("import", [])) if rate is not None}
+            rate_export = {minute: rate for minute, rate in zip(minutes, data.get("export", [])) if rate is not None}
+        else:
+            rate_import = {int(k): v for k, v in data.get("rates_import", {}).items()}
+            rate_export = {int(k): v for k, v in data.get("rates_export", {}).items()}
+        return self._dict_to_array(rate_import), self._dict_to_array(rate_export)
+
+    def load_rates(self, rate_date):
+        """
+        Load the stored rates for the given date.
+
+        Args:
+            rate_date: The date the rates apply to
+
+        Returns:
+            Tuple of (rate_import, rate_export) dicts keyed by minute-of-day,
+            both empty when no file exists for the date
+        """
+        entry = self._load_cached(self._get_filepath(rate_date))
+        if entry is None:
+            return {}, {}
+        if entry["dicts"] is None:
+            entry["dicts"] = (self._array_to_dict(entry["import"]), self._array_to_dict(entry["export"]))
+        # Copy at the boundary so callers mutating the result don't corrupt the cache
+        return dict(entry["dicts"][0]), dict(entry["dicts"][1])
+
+    def load_rate_arrays(self, rate_date):
+        """
+        Load the stored rates for the given date as slot arrays.
+
+        The array form is the store's native representation; callers that can
+        index by slot avoid the dict view built by load_rates entirely.
+
+        Args:
+            rate_date: The date the rates apply to
+
+        Returns:
+            Tuple of (import, export) slot arrays of N_SLOTS values each,
+            all None when no file exists for the date
+        """
+        entry = self._load_cached(self._get_filepath(rate_date))
+        if entry is None:
+            return [None] * N_SLOTS, [None] * N_SLOTS
+        # Copy at the boundary so callers mutating the result don't corrupt the cache
+        return list(entry["import"]), list(entry["export"])
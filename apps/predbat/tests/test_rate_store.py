@@ -0,0 +1,178 @@
+"""
+Tests for RateStore save/load of per-date rate files
+"""
+
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from rate_store import RateStore
+
+
+class MockBase:
+    """Mock base class for RateStore testing"""
+
+    def __init__(self, config_root):
+        self.config_root = config_root
+        self.log_messages = []
+
+    def log(self, message):
+        """Log messages for test verification"""
+        self.log_messages.append(message)
+        print(f"[TEST LOG] {message}")
+
+
+def test_basic_save_load(base, test_dir):
+    """
+    Test that saved import/export rates round-trip with int minute keys
+    """
+    failed = False
+    store = RateStore(base, save_dir=test_dir, run_cleanup=False)
+    rate_import = {0: 10.0, 30: 15.0, 60: 12.5}
+    rate_export = {0: 4.1, 30: 4.1}
+    if not store.save_rates(date(2026, 8, 26), rate_import, rate_export):
+        print("ERROR: save_rates returned failure")
+        failed = True
+    loaded_import, loaded_export = store.load_rates(date(2026, 8, 26))
+    if loaded_import != rate_import:
+        print("ERROR: Loaded import rates {} expected {}".format(loaded_import, rate_import))
+        failed = True
+    if loaded_export != rate_export:
+        print("ERROR: Loaded export rates {} expected {}".format(loaded_export, rate_export))
+        failed = True
+    # Mutating the returned rates must not leak into the load cache
+    loaded_import[0] = 999.0
+    reloaded_import, _ = store.load_rates(date(2026, 8, 26))
+    if reloaded_import != rate_import:
+        print("ERROR: Mutation of loaded rates leaked into cache, reload gave {}".format(reloaded_import))
+        failed = True
+    arr_import, _ = store.load_rate_arrays(date(2026, 8, 26))
+    arr_import[0] = 999.0
+    rearr_import, _ = store.load_rate_arrays(date(2026, 8, 26))
+    if rearr_import[0] != 10.0:
+        print("ERROR: Mutation of loaded arrays leaked into cache, reload gave {}".format(rearr_import[0]))
+        failed = True
+    return failed
+
+
+def test_freeze_merge(base, test_dir):
+    """
+    Test that rates before the freeze point keep their existing values on re-save
+    """
+    failed = False
+    store = RateStore(base, save_dir=test_dir, run_cleanup=False)
+    store.save_rates(date(2026, 8, 26), {0: 10.0, 30: 15.0, 60: 20.0}, {0: 4.0, 30: 4.0, 60: 4.0})
+    # Re-save with changed values, freezing everything before minute 60
+    store.save_rates(date(2026, 8, 26), {0: 99.0, 30: 99.0, 60: 25.0, 90: 30.0}, {0: 9.0, 30: 9.0, 60: 5.0, 90: 5.0}, freeze_before_minute=60)
+    loaded_import, loaded_export = store.load_rates(date(2026, 8, 26))
+    expect_import = {0: 10.0, 30: 15.0, 60: 25.0, 90: 30.0}
+    expect_export = {0: 4.0, 30: 4.0, 60: 5.0, 90: 5.0}
+    if loaded_import != expect_import:
+        print("ERROR: Frozen import rates {} expected {}".format(loaded_import, expect_import))
+        failed = True
+    if loaded_export != expect_export:
+        print("ERROR: Frozen export rates {} expected {}".format(loaded_export, expect_export))
+        failed = True
+    return failed
+
+
+def test_missing_file(base, test_dir):
+    """
+    Test that loading a date with no file returns empty dicts
+    """
+    failed = False
+    store = RateStore(base, save_dir=test_dir, run_cleanup=False)
+    loaded_import, loaded_export = store.load_rates(date(2026, 1, 1))
+    if loaded_import != {} or loaded_export != {}:
+        print("ERROR: Expected empty rates for missing file, got {} / {}".format(loaded_import, loaded_export))
+        failed = True
+    return failed
+
+
+def test_v1_format(base, test_dir):
+    """
+    Test that version 1 rate files (dicts keyed by stringified minutes) still load
+    """
+    failed = False
+    store = RateStore(base, save_dir=test_dir, run_cleanup=False)
+    with open(store._get_filepath(date(2026, 8, 26)), "w") as han:
+        han.write('{"rates_import": {"0": 10.0, "30": 15.0}, "rates_export": {"0": 4.0}}')
+    loaded_import, loaded_export = store.load_rates(date(2026, 8, 26))
+    if loaded_import != {0: 10.0, 30: 15.0}:
+        print("ERROR: v1 import rates {} expected {}".format(loaded_import, {0: 10.0, 30: 15.0}))
+        failed = True
+    if loaded_export != {0: 4.0}:
+        print("ERROR: v1 export rates {} expected {}".format(loaded_export, {0: 4.0}))
+        failed = True
+    return failed
+
+
+def test_batch_save(base, test_dir):
+    """
+    Test that save_rates_batch writes several dates and each loads back correctly
+    """
+    failed = False
+    store = RateStore(base, save_dir=test_dir, run_cleanup=False)
+    today = date(2026, 8, 26)
+    items = [
+        (today, {0: 10.0, 30: 15.0}, {0: 4.0}),
+        (today + timedelta(days=1), {0: 11.0}, {0: 4.5}),
+        (today + timedelta(days=2), {0: 12.0}, {}, 0),
+    ]
+    if not store.save_rates_batch(items):
+        print("ERROR: save_rates_batch returned failure")
+        failed = True
+    for item in items:
+        loaded_import, loaded_export = store.load_rates(item[0])
+        if loaded_import != item[1] or loaded_export != item[2]:
+            print("ERROR: Batch rates for {} loaded {} / {} expected {} / {}".format(item[0], loaded_import, loaded_export, item[1], item[2]))
+            failed = True
+    return failed
+
+
+def test_cleanup_old(base, test_dir):
+    """
+    Test that cleanup_old_files removes rate files past the retention period
+    """
+    failed = False
+    store = RateStore(base, save_dir=test_dir, run_cleanup=False)
+    store.save_rates(date(2026, 8, 26), {0: 10.0}, {0: 4.0})
+    old_file = store._get_filepath(date(2026, 8, 1))
+    with open(old_file, "w") as han:
+        han.write("{}")
+    old_time = time.time() - 30 * 24 * 60 * 60
+    os.utime(old_file, (old_time, old_time))
+    store.cleanup_old_files(keep_days=7)
+    if os.path.exists(old_file):
+        print("ERROR: Expected old rate file {} to be removed".format(old_file))
+        failed = True
+    if not os.path.exists(store.actual_path(store._get_filepath(date(2026, 8, 26)))):
+        print("ERROR: Recent rate file was removed by cleanup")
+        failed = True
+    return failed
+
+
+def run_rate_store_tests(my_predbat=None):
+    """
+    Run all RateStore tests, returns True if any test failed
+    """
+    print("**** Running RateStore tests ****")
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="predbat_test_rate_store_") as test_dir:
+        base = MockBase(test_dir)
+        for name, test_func in [
+            ("basic_save_load", test_basic_save_load),
+            ("freeze_merge", test_freeze_merge),
+            ("missing_file", test_missing_file),
+            ("v1_format", test_v1_format),
+            ("batch_save", test_batch_save),
+            ("cleanup_old", test_cleanup_old),
+        ]:
+            print("\n*** Rate store test: {} ***".format(name))
+            if test_func(base, os.path.join(test_dir, name)):
+                print("✗ FAILED: {}".format(name))
+                failed = True
+            else:
+                print("✓ PASSED: {}".format(name))
+    return failed